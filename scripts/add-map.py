@@ -11,40 +11,60 @@ Requirements:
 
 Usage:
   python scripts/add-map.py <group_name> <map_name> [workshop_id] [--custom] [--dry-run] [--position start|end]
+  python scripts/add-map.py --from-file <entries_file> [--custom] [--dry-run] [--position start|end]
 
 Examples:
   python scripts/add-map.py mg_aim aim_ak-colt_CS2 123456789 --custom
   python scripts/add-map.py mg_active de_train --position start
   python scripts/add-map.py mg_active de_dust2 3070284539
+  python scripts/add-map.py --from-file maps.tsv --custom
 
 Notes:
 - Workshop ID is the trailing number from the Workshop URL, e.g.
   https://steamcommunity.com/sharedfiles/filedetails/?id=3070284539 -> 3070284539
 - If workshop_id is provided, the map path is written as: workshop/<id>/<map_name>
+- With --from-file, each non-blank line holds <group_name> <map_name> [workshop_id] separated by
+  tabs or spaces (lines starting with # are ignored). The gamemodes file is read, backed up and
+  written once for the whole batch.
 """
 
 from __future__ import annotations
 
 import argparse
+import functools
+import os
 import pathlib
 import shutil
 import sys
-from typing import Optional, Tuple
+from typing import AbstractSet, Dict, FrozenSet, Optional, Sequence, Tuple
 
 
 class AddMapError(RuntimeError):
     pass
 
 
-def read_lines(path: pathlib.Path) -> list[str]:
+# (maps_start, maps_end, indent, existing_keys); see scan_map_groups.
+MapsBlock = Tuple[int, int, str, FrozenSet[str]]
+# (group_name, map_name, workshop_id)
+MapEntry = Tuple[str, str, Optional[str]]
+
+
+def read_text(path: pathlib.Path) -> str:
     try:
-        return path.read_text(encoding="utf-8", errors="replace").splitlines(keepends=True)
+        return path.read_text(encoding="utf-8", errors="replace")
     except FileNotFoundError:
         raise AddMapError(f"Missing file: {path}")
 
 
-def write_lines(path: pathlib.Path, lines: list[str]) -> None:
-    path.write_text("".join(lines), encoding="utf-8")
+def stat_or_none(path: pathlib.Path) -> Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def write_text(path: pathlib.Path, text: str) -> None:
+    path.write_text(text, encoding="utf-8")
 
 
 def backup_file(path: pathlib.Path) -> pathlib.Path:
@@ -53,125 +73,107 @@ def backup_file(path: pathlib.Path) -> pathlib.Path:
     return backup
 
 
-def find_group_and_maps_block(lines: list[str], group_name: str) -> Tuple[int, int, int, str]:
+def scan_map_groups(text: str, wanted: Optional[AbstractSet[str]] = None) -> Dict[str, Optional[MapsBlock]]:
     """
-    Returns (group_start_idx, maps_start_idx, maps_end_idx, indent)
-    - maps_start_idx points at the first line INSIDE the maps block (after the opening brace)
-    - maps_end_idx points at the closing brace line of the maps block
+    Returns the groups under "mapgroups", each mapped to its maps block or None when it has none.
+    A maps block is (maps_start, maps_end, indent, existing_keys)
+    - maps_start points at the first line INSIDE the maps block (after the opening brace)
+    - maps_end points at the start of the closing brace line of the maps block
     - indent is the indentation used for map entries
+    - existing_keys holds the map keys already listed in the block
+    When wanted is given, only those groups are reported, and the scan stops as soon as all of
+    them have been closed.
+
+    Only the braces are visited: str.find jumps from one to the next, and the nesting is tracked
+    as a single depth counter. A "{" is named after the last quoted string before it, but the name
+    is only read at the depths where "mapgroups", a group or its "maps" block can open.
     """
-    in_mapgroups = False
-    i = 0
-
-    # 1) Find "mapgroups"
-    while i < len(lines):
-        if lines[i].lstrip().startswith('"mapgroups"'):
-            in_mapgroups = True
-            break
-        i += 1
-    if not in_mapgroups:
+    groups: Dict[str, Optional[MapsBlock]] = {}
+    remaining = None if wanted is None else set(wanted)
+    depth = 0
+    mapgroups_depth = 0
+    group_depth = 0
+    group_name = ""
+    maps_depth = 0
+    maps_start = -1
+    find = text.find
+    rfind = text.rfind
+
+    next_open = find("{")
+    next_close = find("}")
+    while next_open != -1 or next_close != -1:
+        if next_open != -1 and (next_close == -1 or next_open < next_close):
+            pos = next_open
+            next_open = find("{", pos + 1)
+            depth += 1
+            if mapgroups_depth and depth != mapgroups_depth + 1 and depth != group_depth + 1:
+                continue  # e.g. the maps block of a group nobody asked for
+            q2 = rfind('"', 0, pos)
+            q1 = rfind('"', 0, q2) if q2 > 0 else -1
+            name = text[q1 + 1 : q2] if q1 != -1 else ""
+            if not mapgroups_depth:
+                if name == "mapgroups":
+                    mapgroups_depth = depth
+            elif depth == mapgroups_depth + 1:
+                if wanted is None or name in wanted:
+                    group_name = name
+                    group_depth = depth
+                    groups.setdefault(name, None)
+            elif name == "maps":
+                nl = find("\n", pos)
+                maps_start = len(text) if nl == -1 else nl + 1
+                maps_depth = depth
+        else:
+            pos = next_close
+            next_close = find("}", pos + 1)
+            if maps_depth and depth == maps_depth:
+                maps_end = rfind("\n", 0, pos) + 1  # points at the closing brace line
+                existing_keys = set()
+                indent = None
+                for line in text[maps_start:maps_end].splitlines():
+                    # Expect lines like:  "de_inferno"  ""
+                    # Slice the key out between the first two quotes; split() would build a list.
+                    stripped = line.lstrip()
+                    q = stripped.find('"', 1)
+                    if q > 1 and stripped[0] == '"':
+                        existing_keys.add(stripped[1:q])
+                        if indent is None:
+                            # new entries reuse the indentation of the first existing one
+                            indent = line[: len(line) - len(stripped)]
+                if indent is None:
+                    # Fallback: use 4 tabs similar to Valve files
+                    indent = "\t" * 4
+                groups[group_name] = (maps_start, maps_end, indent, frozenset(existing_keys))
+                maps_depth = 0
+                if remaining is not None:
+                    remaining.discard(group_name)
+                    if not remaining:
+                        break
+            elif group_depth and depth == group_depth:
+                group_depth = 0
+                if remaining is not None:
+                    remaining.discard(group_name)
+                    if not remaining:
+                        break
+            elif mapgroups_depth and depth == mapgroups_depth:
+                break  # the rest of the file holds no groups
+            if depth:
+                depth -= 1
+
+    if not mapgroups_depth:
         raise AddMapError('Could not find a "mapgroups" section.')
+    if maps_depth:
+        raise AddMapError(f'Malformed "maps" block in group "{group_name}".')
+    return groups
 
-    # 2) Walk braces to find the block of mapgroups { ... }
-    i += 1
-    brace_depth = 0
-    while i < len(lines) and "{" not in lines[i]:
-        i += 1
-    if i >= len(lines):
-        raise AddMapError('Malformed "mapgroups" block (missing "{").')
-    brace_depth += 1
-    i += 1
-
-    # 3) Find the group block by name
-    group_start = -1
-    while i < len(lines) and brace_depth > 0:
-        stripped = lines[i].strip()
-        if "{" in lines[i]:
-            brace_depth += lines[i].count("{")
-        if "}" in lines[i]:
-            brace_depth -= lines[i].count("}")
-
-        if stripped.startswith(f'"{group_name}"'):
-            group_start = i
-            break
-        i += 1
-
-    if group_start == -1:
-        raise AddMapError(f'Group "{group_name}" not found in mapgroups.')
 
-    # 4) Enter group block
-    # find opening "{"
-    j = group_start
-    while j < len(lines) and "{" not in lines[j]:
-        j += 1
-    if j >= len(lines):
-        raise AddMapError(f'Malformed group "{group_name}" (missing "{{").')
-
-    # Now traverse this group’s braces to locate the "maps" block
-    j += 1
-    group_brace_depth = 1
-    maps_open_line = -1
-    while j < len(lines) and group_brace_depth > 0:
-        stripped = lines[j].strip()
-
-        # detect maps block header
-        if stripped.startswith('"maps"'):
-            # find the "{" for maps block
-            k = j
-            while k < len(lines) and "{" not in lines[k]:
-                k += 1
-            if k >= len(lines):
-                raise AddMapError(f'Malformed "maps" block in group "{group_name}".')
-            # maps block starts after the "{"
-            maps_block_open = k
-            maps_start_idx = maps_block_open + 1
-
-            # find matching "}" for maps
-            maps_brace_depth = 1
-            m = maps_start_idx
-            while m < len(lines) and maps_brace_depth > 0:
-                maps_brace_depth += lines[m].count("{")
-                maps_brace_depth -= lines[m].count("}")
-                if maps_brace_depth == 0:
-                    maps_end_idx = m  # points at the closing brace line
-                    # indentation: reuse the indentation of existing entries if available, else infer
-                    indent = infer_maps_indent(lines, maps_start_idx, maps_end_idx)
-                    return (group_start, maps_start_idx, maps_end_idx, indent)
-                m += 1
-            raise AddMapError(f'Malformed "maps" block in group "{group_name}".')
-
-        # normal brace walk inside group
-        if "{" in lines[j]:
-            group_brace_depth += lines[j].count("{")
-        if "}" in lines[j]:
-            group_brace_depth -= lines[j].count("}")
-        j += 1
-
-    raise AddMapError(f'No "maps" block found in group "{group_name}".')
-
-
-def infer_maps_indent(lines: list[str], start_idx: int, end_idx: int) -> str:
-    # Look for the first existing map entry to determine indentation
-    for i in range(start_idx, end_idx):
-        stripped = lines[i].strip()
-        if stripped.startswith('"') and '"' in stripped and '\t' in lines[i] or '\t' in lines[i]:
-            # likely an entry line; reuse its leading whitespace
-            return lines[i][: len(lines[i]) - len(lines[i].lstrip())]
-        if stripped.startswith('"') and '\t' not in lines[i]:
-            return lines[i][: len(lines[i]) - len(lines[i].lstrip())]
-    # Fallback: use 4 tabs similar to Valve files
-    return "\t" * 4
-
-
-def current_maps_in_block(lines: list[str], start_idx: int, end_idx: int) -> list[str]:
-    maps = []
-    for i in range(start_idx, end_idx):
-        stripped = lines[i].strip()
-        # Expect lines like:  "de_inferno"  ""
-        if stripped.startswith('"') and '"' in stripped:
-            key = stripped.split('"')[1]
-            maps.append(key)
-    return maps
+def get_maps_block(groups: Dict[str, Optional[MapsBlock]], group_name: str) -> MapsBlock:
+    if group_name not in groups:
+        raise AddMapError(f'Group "{group_name}" not found in mapgroups.')
+    block = groups[group_name]
+    if block is None:
+        raise AddMapError(f'No "maps" block found in group "{group_name}".')
+    return block
 
 
 def format_map_key(map_name: str, workshop_id: Optional[str]) -> str:
@@ -180,29 +182,123 @@ def format_map_key(map_name: str, workshop_id: Optional[str]) -> str:
     return map_name
 
 
-def insert_map(lines: list[str], start_idx: int, end_idx: int, indent: str, map_key: str, position: str) -> None:
-    new_line = f'{indent}"{map_key}"\t\t""\n'
-    if position == "start":
-        lines.insert(start_idx, new_line)
-    else:
-        # insert just before the closing brace
-        lines.insert(end_idx, new_line)
-
+def render_map_line(indent: str, map_key: str) -> str:
+    return f'{indent}"{map_key}"\t\t""\n'
 
-def add_workshop_id(file_path: pathlib.Path, workshop_id: str, dry_run: bool = False) -> bool:
-    existing = set()
-    if file_path.exists():
-        text = file_path.read_text(encoding="utf-8", errors="replace")
-        existing = set(line.strip() for line in text.splitlines() if line.strip())
 
-    if workshop_id in existing:
-        return False
-
-    if not dry_run:
+def add_workshop_ids(file_path: pathlib.Path, workshop_ids: Sequence[str], dry_run: bool = False) -> list[str]:
+    """Appends the ids not yet listed in file_path and returns them, in the order given."""
+    wanted = list(dict.fromkeys(workshop_ids))
+    flags = os.O_RDONLY if dry_run else os.O_RDWR | os.O_CREAT | os.O_APPEND
+    # One descriptor serves both the lookup and the append. O_APPEND makes the write land at
+    # the end of the file even if another invocation appended in the meantime.
+    try:
+        fd = os.open(file_path, flags, 0o644)
+    except FileNotFoundError:
+        if dry_run:
+            return wanted
         file_path.parent.mkdir(parents=True, exist_ok=True)
-        with file_path.open("a", encoding="utf-8") as f:
-            f.write(f"{workshop_id}\n")
-    return True
+        fd = os.open(file_path, flags, 0o644)
+
+    try:
+        data = _read_all(fd)
+        present = {line.strip() for line in data.splitlines()}
+        missing = [w for w in wanted if w.encode("utf-8") not in present]
+        if missing and not dry_run:
+            # keep the last existing id on its own line if the file lacks a trailing newline
+            prefix = b"\n" if data and not data.endswith(b"\n") else b""
+            os.write(fd, prefix + "".join(f"{w}\n" for w in missing).encode("utf-8"))
+    finally:
+        os.close(fd)
+    return missing
+
+
+def _read_all(fd: int) -> bytes:
+    chunks = []
+    while True:
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def read_entries(path: pathlib.Path) -> list[MapEntry]:
+    """
+    Reads batch entries, one per line: <group_name> <map_name> [workshop_id]
+    Fields are separated by tabs or spaces; blank lines and lines starting with # are ignored.
+    """
+    entries: list[MapEntry] = []
+    for lineno, line in enumerate(read_text(path).splitlines(), 1):
+        fields = line.split()
+        if not fields or fields[0].startswith("#"):
+            continue
+        if len(fields) not in (2, 3):
+            raise AddMapError(f"{path}:{lineno}: expected <group_name> <map_name> [workshop_id].")
+        entries.append((fields[0], fields[1], fields[2] if len(fields) == 3 else None))
+    return entries
+
+
+def add_maps_bulk(
+    gamemodes_path: pathlib.Path,
+    subscribed_file_ids_path: pathlib.Path,
+    entries: Sequence[MapEntry],
+    dry_run: bool,
+    position: str,
+) -> None:
+    """
+    Adds (group_name, map_name, workshop_id) entries with a single read, scan, backup and write
+    of the gamemodes file. Nothing is written if any entry names a missing group.
+    """
+    text = read_text(gamemodes_path)
+    groups = scan_map_groups(text, {group_name for group_name, _, _ in entries})
+
+    inserts: list[Tuple[int, str]] = []
+    # skip and ok messages in input order, printed once the file has been written
+    messages: list[str] = []
+    pending_keys: Dict[str, set[str]] = {}
+    for group_name, map_name, workshop_id in entries:
+        maps_start, maps_end, indent, existing_keys = get_maps_block(groups, group_name)
+        map_key = format_map_key(map_name, workshop_id)
+        group_pending = pending_keys.setdefault(group_name, set())
+        if map_key in existing_keys:
+            messages.append(f"[skip] Map already present in '{group_name}': {map_key}")
+            continue
+        if map_key in group_pending:
+            messages.append(f"[skip] Duplicate in batch for '{group_name}': {map_key}")
+            continue
+        group_pending.add(map_key)
+        # insert at the top of the block, or just before the closing brace
+        offset = maps_start if position == "start" else maps_end
+        inserts.append((offset, render_map_line(indent, map_key)))
+        messages.append(f"[ok] Added map to '{group_name}': {map_key} ({'dry-run' if dry_run else 'written'})")
+
+    # sort is stable, so entries sharing an offset keep their input order
+    inserts.sort(key=lambda item: item[0])
+    pieces = []
+    last = 0
+    for offset, new_line in inserts:
+        pieces.append(text[last:offset])
+        pieces.append(new_line)
+        last = offset
+    pieces.append(text[last:])
+    new_text = "".join(pieces)
+
+    # backup then write, only when there is something to write
+    if not dry_run and new_text != text:
+        backup = backup_file(gamemodes_path)
+        print(f"[backup] {backup}")
+        write_text(gamemodes_path, new_text)
+    for message in messages:
+        print(message)
+
+    workshop_ids = [workshop_id for _, _, workshop_id in entries if workshop_id]
+    if workshop_ids:
+        subscribed = set(add_workshop_ids(subscribed_file_ids_path, workshop_ids, dry_run=dry_run))
+        for workshop_id in dict.fromkeys(workshop_ids):
+            if workshop_id in subscribed:
+                print(f"[ok] Subscribed Workshop ID {workshop_id} ({'dry-run' if dry_run else 'written'})")
+            else:
+                print(f"[skip] Workshop ID already present: {workshop_id}")
 
 
 def add_map_to_group(
@@ -214,32 +310,10 @@ def add_map_to_group(
     dry_run: bool,
     position: str,
 ) -> None:
-    lines = read_lines(gamemodes_path)
-
-    map_key = format_map_key(map_name, workshop_id)
-    group_start, maps_start, maps_end, indent = find_group_and_maps_block(lines, group_name)
-    maps_list = current_maps_in_block(lines, maps_start, maps_end)
-
-    if map_key in maps_list:
-        print(f"[skip] Map already present in '{group_name}': {map_key}")
-    else:
-        # backup then insert
-        if not dry_run:
-            backup = backup_file(gamemodes_path)
-            print(f"[backup] {backup}")
-        insert_map(lines, maps_start, maps_end, indent, map_key, position)
-        if not dry_run:
-            write_lines(gamemodes_path, lines)
-        print(f"[ok] Added map to '{group_name}': {map_key} ({'dry-run' if dry_run else 'written'})")
-
-    if workshop_id:
-        added = add_workshop_id(subscribed_file_ids_path, workshop_id, dry_run=dry_run)
-        if added:
-            print(f"[ok] Subscribed Workshop ID {workshop_id} ({'dry-run' if dry_run else 'written'})")
-        else:
-            print(f"[skip] Workshop ID already present: {workshop_id}")
+    add_maps_bulk(gamemodes_path, subscribed_file_ids_path, [(group_name, map_name, workshop_id)], dry_run, position)
 
 
+@functools.lru_cache(maxsize=4)
 def resolve_paths(use_custom: bool) -> Tuple[pathlib.Path, pathlib.Path]:
     if use_custom:
         gm = pathlib.Path("custom_files/gamemodes_server.txt")
@@ -252,31 +326,55 @@ def resolve_paths(use_custom: bool) -> Tuple[pathlib.Path, pathlib.Path]:
 
 def main() -> int:
     p = argparse.ArgumentParser(description="Add a map to a given CS2 game mode map group.")
-    p.add_argument("group_name", type=str, help="Game mode group (e.g., mg_aim)")
-    p.add_argument("map_name", type=str, help="Map name (e.g., aim_ak-colt_CS2)")
+    p.add_argument("group_name", type=str, nargs="?", help="Game mode group (e.g., mg_aim)")
+    p.add_argument("map_name", type=str, nargs="?", help="Map name (e.g., aim_ak-colt_CS2)")
     p.add_argument("workshop_id", type=str, nargs="?", default=None, help="Workshop ID (optional)")
     p.add_argument("--custom", action="store_true", help="Use custom file paths instead of global ones.")
     p.add_argument("--dry-run", action="store_true", help="Do not write changes; just print actions.")
     p.add_argument("--position", choices=["start", "end"], default="end", help="Where to insert within the maps block.")
+    p.add_argument(
+        "--from-file",
+        type=pathlib.Path,
+        default=None,
+        help="Add every '<group_name> <map_name> [workshop_id]' line of this file in one pass.",
+    )
     args = p.parse_args()
 
+    if args.from_file is not None:
+        if args.group_name or args.map_name or args.workshop_id:
+            p.error("group_name, map_name and workshop_id cannot be combined with --from-file")
+    elif not args.group_name or not args.map_name:
+        p.error("group_name and map_name are required unless --from-file is given")
+
     gamemodes_path, subscribed_path = resolve_paths(args.custom)
 
+    # Stat the gamemodes file once, up front; both branches below need to know it exists.
+    gamemodes_exists = stat_or_none(gamemodes_path) is not None
+
     # Basic existence checks (for custom mode we require both files to exist; for global,
     # at least gamemodes should exist; subscribed file will be created as needed).
     if args.custom:
-        if not gamemodes_path.exists() or not subscribed_path.exists():
+        if not gamemodes_exists or stat_or_none(subscribed_path) is None:
             print(
                 "Error: Custom files do not exist. Create both "
                 f"{gamemodes_path} and {subscribed_path} before using --custom."
             )
             return 1
     else:
-        if not gamemodes_path.exists():
+        if not gamemodes_exists:
             print(f"Error: Missing {gamemodes_path}.")
             return 1
 
     try:
+        if args.from_file is not None:
+            add_maps_bulk(
+                gamemodes_path,
+                subscribed_path,
+                read_entries(args.from_file),
+                args.dry_run,
+                args.position,
+            )
+            return 0
         add_map_to_group(
             gamemodes_path,
             subscribed_path,